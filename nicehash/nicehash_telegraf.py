@@ -7,6 +7,11 @@ then outputs InfluxDB line protocol for Telegraf to forward to QuestDB.
 Usage:
     python3 nicehash_telegraf.py --config /path/to/nicehash_config.json
 
+Long-running modes reuse the HTTP session and HMAC state between polls:
+    python3 nicehash_telegraf.py --daemon --interval 300   # poll on a timer
+    python3 nicehash_telegraf.py --execd                   # poll on each stdin newline
+                                                           # (Telegraf inputs.execd, signal = "STDIN")
+
 Config file (JSON):
     {
         "api_key": "your-api-key",
@@ -26,21 +31,37 @@ Output measurements (InfluxDB line protocol):
 import argparse
 import hmac
 import json
+import operator
 import os
 import sys
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from hashlib import sha256
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("ERROR: 'requests' package required. Install with: pip3 install requests", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 BASE_URL = "https://api2.nicehash.com"
 
+# All calls go to the same host, so one pooled session keeps the TLS connection alive between them.
+# Retries are done in nicehash_request rather than by urllib3 so every attempt gets a fresh nonce.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+RETRIES = 2
+RETRY_STATUSES = (502, 503, 504)
+
 
 def load_config(path):
     with open(path) as f:
@@ -49,50 +70,100 @@ def load_config(path):
         if key not in cfg or not cfg[key]:
             print(f"ERROR: '{key}' missing in config file", file=sys.stderr)
             sys.exit(1)
+    cfg["_api_key_b"] = cfg["api_key"].encode()
+    cfg["_org_id_b"] = cfg["org_id"].encode()
+    cfg["_secret_bytes"] = cfg["api_secret"].encode()
+    # The secret never changes, so derive the HMAC key pads once and copy them per request
+    cfg["_hmac_template"] = hmac.new(cfg["_secret_bytes"], None, sha256)
     return cfg
 
 
-def nicehash_request(cfg, method, path, query=""):
-    """Make an authenticated NiceHash API v2 request."""
-    xtime = str(int(time.time() * 1000))
-    xnonce = str(uuid.uuid4())
+def new_nonce():
+    """Return a random 36-char nonce in UUID layout without building a uuid.UUID."""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
-    # Build HMAC input: key \0 time \0 nonce \0 \0 org_id \0 \0 method \0 path \0 query
-    message = bytearray(cfg["api_key"], "utf-8")
-    message += b"\x00" + bytearray(xtime, "utf-8")
-    message += b"\x00" + bytearray(xnonce, "utf-8")
-    message += b"\x00\x00" + bytearray(cfg["org_id"], "utf-8")
-    message += b"\x00\x00" + bytearray(method, "utf-8")
-    message += b"\x00" + bytearray(path, "utf-8")
-    message += b"\x00" + bytearray(query, "utf-8")
 
-    digest = hmac.new(bytearray(cfg["api_secret"], "utf-8"), message, sha256).hexdigest()
+def signed_headers(cfg, method, path, query):
+    """Build NiceHash auth headers with a fresh time and nonce."""
+    xtime = str(time.time_ns() // 1_000_000)
+    xnonce = new_nonce()
 
-    headers = {
+    # Build HMAC input: key \0 time \0 nonce \0 \0 org_id \0 \0 method \0 path \0 query
+    message = b"".join((
+        cfg["_api_key_b"], b"\x00",
+        xtime.encode(), b"\x00",
+        xnonce.encode(), b"\x00\x00",
+        cfg["_org_id_b"], b"\x00\x00",
+        method.encode(), b"\x00",
+        path.encode(), b"\x00",
+        query.encode(),
+    ))
+
+    h = cfg["_hmac_template"].copy()
+    h.update(message)
+    digest = h.hexdigest()
+
+    return {
         "X-Time": xtime,
         "X-Nonce": xnonce,
         "X-Auth": cfg["api_key"] + ":" + digest,
         "X-Organization-Id": cfg["org_id"],
-        "X-Request-Id": str(uuid.uuid4()),
+        "X-Request-Id": new_nonce(),
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip",
     }
 
+
+def nicehash_request(cfg, method, path, query=""):
+    """Make an authenticated NiceHash API v2 request, retrying transient failures."""
     url = BASE_URL + path
     if query:
         url += "?" + query
 
-    resp = requests.get(url, headers=headers, timeout=15)
-    resp.raise_for_status()
-    return resp.json()
+    for attempt in range(RETRIES + 1):
+        last = attempt == RETRIES
+        try:
+            resp = SESSION.get(url, headers=signed_headers(cfg, method, path, query), timeout=15)
+        except requests.ConnectionError:
+            if last:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUSES or last:
+                resp.raise_for_status()
+                return _loads(resp.content)
+        time.sleep(0.2 * 2 ** attempt)
+
+
+_TAG_TABLE = str.maketrans({" ": "\\ ", ",": "\\,", "=": "\\="})
+_FIELD_STR_TABLE = str.maketrans({'"': '\\"'})
+
+_RIG_KEYS = ("rigId", "name", "minerStatus", "unpaidAmount", "profitability", "stats")
+_rig_fields = operator.itemgetter(*_RIG_KEYS)
+
+# The rig line layout is fixed, so bind the template formatters once
+_RIG_LINE = "nicehash_rigs,rig_name={rn},rig_id={ri},status={st} unpaid={u},profitability={p} {t}".format
+_RIG_LINE_SPEED = (
+    "nicehash_rigs,rig_name={rn},rig_id={ri},status={st} "
+    "unpaid={u},profitability={p},speed_accepted={sa},speed_rejected={sr} {t}"
+).format
 
 
 def escape_tag(value):
     """Escape special characters in InfluxDB tag values."""
-    return str(value).replace(" ", "\\ ").replace(",", "\\,").replace("=", "\\=")
+    s = str(value)
+    # Most tags (rig IDs, tickers, statuses) need no escaping; return them as-is
+    if " " not in s and "," not in s and "=" not in s:
+        return s
+    return s.translate(_TAG_TABLE)
 
 
 def escape_field_str(value):
     """Escape a string field value for InfluxDB line protocol."""
-    return '"' + str(value).replace('"', '\\"') + '"'
+    s = str(value)
+    if '"' not in s:
+        return '"' + s + '"'
+    return '"' + s.translate(_FIELD_STR_TABLE) + '"'
 
 
 def fetch_payouts(cfg):
@@ -122,55 +193,75 @@ def fetch_payouts(cfg):
     return lines
 
 
-def fetch_rigs(cfg, group_name=None):
-    """Fetch rig status and output as InfluxDB line protocol."""
+def fetch_rigs(cfg, group_name=None, size=50):
+    """Fetch rig status, page by page, and output as InfluxDB line protocol."""
     lines = []
     try:
-        query = "size=50&page=0"
-        if group_name:
-            query = f"size=50&page=0&path={group_name}"
-        data = nicehash_request(cfg, "GET", "/main/api/v2/mining/rigs2", query)
-        now_ns = int(time.time() * 1e9)
+        def rigs_page(page):
+            query = f"size={size}&page={page}"
+            if group_name:
+                query += f"&path={group_name}"
+            return nicehash_request(cfg, "GET", "/main/api/v2/mining/rigs2", query)
+
+        data = rigs_page(0)
+        total_pages = (data.get("pagination") or {}).get("totalPageCount")
+
+        def iter_rigs():
+            # Only a full page can have a successor; stop early when the API reports the page count
+            page, rigs = 0, data.get("miningRigs") or []
+            while True:
+                yield from rigs
+                page += 1
+                if len(rigs) < size or (total_pages is not None and page >= total_pages):
+                    return
+                rigs = rigs_page(page).get("miningRigs") or []
+
+        # Formatted once; every line in this poll shares the same timestamp
+        now_ns = str(time.time_ns())
 
         # Total unpaid amount for the whole account
         total_unpaid = float(data.get("unpaidAmount", 0))
         total_profitability = float(data.get("totalProfitability", 0))
         next_payout_ts = data.get("nextPayoutTimestamp")
-        next_payout_str = ""
-        if next_payout_ts:
-            next_payout_str = str(next_payout_ts)
 
         fields = f"unpaid_total={total_unpaid},profitability_total={total_profitability}"
-        if next_payout_str:
-            fields += f",next_payout_ts={escape_field_str(next_payout_str)}"
+        if next_payout_ts:
+            fields += f",next_payout_ts={escape_field_str(next_payout_ts)}"
+            # Numeric (ms) timestamps are also written as a typed integer field
+            if isinstance(next_payout_ts, (int, float)) and not isinstance(next_payout_ts, bool):
+                fields += f",next_payout_ms={int(next_payout_ts)}i"
         lines.append(f"nicehash_account {fields} {now_ns}")
 
         # Per-rig data
-        rigs = data.get("miningRigs", [])
-        for rig in rigs:
-            rig_id = rig.get("rigId", "unknown")
-            rig_name = rig.get("name", rig_id)
-            status = rig.get("minerStatus", "UNKNOWN")
-            unpaid = float(rig.get("unpaidAmount", 0))
-            profitability = float(rig.get("profitability", 0))
-
-            # Extract speed from stats if available
-            speed_accepted = 0.0
-            speed_rejected = 0.0
-            stats = rig.get("stats", [])
+        for rig in iter_rigs():
+            try:
+                rig_id, rig_name, status, unpaid, profitability, stats = _rig_fields(rig)
+            except KeyError:
+                # Sparse rig entry; fall back to per-key lookups with None for missing keys
+                rig_id, rig_name, status, unpaid, profitability, stats = map(rig.get, _RIG_KEYS)
+            rig_id = rig_id or "unknown"
+            rig_name = rig_name or rig_id
+            status = status or "UNKNOWN"
+            unpaid = float(unpaid or 0)
+            profitability = float(profitability or 0)
+            stats = stats or ()
+
+            rn, ri, st = escape_tag(rig_name), escape_tag(rig_id), escape_tag(status)
+
+            # Speed fields are only emitted when the rig reports stats
             if stats:
+                speed_accepted = 0.0
+                speed_rejected = 0.0
                 for stat in stats:
-                    speed_accepted += float(stat.get("speedAccepted", 0))
-                    speed_rejected += float(stat.get("speedRejected", 0))
-
-            tags = f"rig_name={escape_tag(rig_name)},rig_id={escape_tag(rig_id)},status={escape_tag(status)}"
-            fields = (
-                f"unpaid={unpaid},"
-                f"profitability={profitability},"
-                f"speed_accepted={speed_accepted},"
-                f"speed_rejected={speed_rejected}"
-            )
-            lines.append(f"nicehash_rigs,{tags} {fields} {now_ns}")
+                    stat_get = stat.get
+                    speed_accepted += float(stat_get("speedAccepted") or 0)
+                    speed_rejected += float(stat_get("speedRejected") or 0)
+                lines.append(_RIG_LINE_SPEED(
+                    rn=rn, ri=ri, st=st, u=unpaid, p=profitability,
+                    sa=speed_accepted, sr=speed_rejected, t=now_ns,
+                ))
+            else:
+                lines.append(_RIG_LINE(rn=rn, ri=ri, st=st, u=unpaid, p=profitability, t=now_ns))
 
     except Exception as e:
         print(f"ERROR fetching rigs: {e}", file=sys.stderr)
@@ -183,7 +274,7 @@ def fetch_balance(cfg):
     lines = []
     try:
         data = nicehash_request(cfg, "GET", "/main/api/v2/accounting/accounts2/", "")
-        now_ns = int(time.time() * 1e9)
+        now_ns = str(time.time_ns())
 
         currencies = data.get("currencies", data.get("total", data)) if isinstance(data, dict) else data
 
@@ -217,6 +308,24 @@ def fetch_balance(cfg):
     return lines
 
 
+def run_once(cfg, group_name=None):
+    """Run one poll cycle and write its line protocol to stdout."""
+    # The three endpoints are independent; fetch them in parallel over the shared session
+    lines = []
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        futures = [
+            ex.submit(fetch_rigs, cfg, group_name),
+            ex.submit(fetch_payouts, cfg),
+            ex.submit(fetch_balance, cfg),
+        ]
+        for fut in futures:
+            lines.extend(fut.result())
+
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(description="NiceHash API poller for Telegraf")
     parser.add_argument(
@@ -229,17 +338,43 @@ def main():
         default=None,
         help="Filter rigs by group name (path parameter)",
     )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and poll every --interval seconds",
+    )
+    mode.add_argument(
+        "--execd",
+        action="store_true",
+        help="Keep running and poll on each newline read from stdin (Telegraf execd)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Seconds between polls in --daemon mode (default: 300)",
+    )
     args = parser.parse_args()
+    if args.interval is None:
+        args.interval = 300
+    elif not args.daemon:
+        parser.error("--interval requires --daemon")
+    elif args.interval <= 0:
+        parser.error("--interval must be greater than 0")
 
     cfg = load_config(args.config)
 
-    lines = []
-    lines.extend(fetch_rigs(cfg, args.group_name))
-    lines.extend(fetch_payouts(cfg))
-    lines.extend(fetch_balance(cfg))
-
-    for line in lines:
-        print(line)
+    if args.execd:
+        for _ in sys.stdin:
+            run_once(cfg, args.group_name)
+    elif args.daemon:
+        while True:
+            started = time.monotonic()
+            run_once(cfg, args.group_name)
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    else:
+        run_once(cfg, args.group_name)
 
 
 if __name__ == "__main__":